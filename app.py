@@ -9,8 +9,11 @@ from src.config import Settings
 from src.utils import ensure_dirs, Timer
 
 from src.vectorstore import VectorStore
+from src.sharded import ShardedVectorStore
 from src.retriever import Retriever
+from src.reranker import Reranker
 from src.rag_chain import RAGChain
+from src.faq import FAQCache
 
 st.set_page_config(page_title="Insure Doc Assistant", page_icon="📄", layout="wide")
 
@@ -32,6 +35,19 @@ def sample_pdfs():
 # --- Config din .env
 settings = Settings()
 
+
+def open_store():
+    """Indexul plat (data/index/) sau cel shard-uit per produs (data/index/<shard>/)."""
+    if settings.INDEX_SHARDED:
+        return ShardedVectorStore(index_dir=INDEX_DIR, settings=settings)
+    return VectorStore(index_dir=INDEX_DIR)
+
+
+@st.cache_resource
+def load_retriever():
+    """Store + retriever păstrate între rerun-uri (shard-uri încărcate leneș, LRU, BM25, modele)."""
+    return Retriever(open_store(), reranker=Reranker(settings), rrf_k=settings.RRF_K)
+
 # --- Page header
 st.title("📄 Insure Doc Assistant – RAG on PDFs")
 st.caption("PDF-urile din `data/samples/` se indexează automat (bundled). Apoi poți întreba și primești citări de surse.")
@@ -41,17 +57,19 @@ with st.sidebar:
     st.write(f"Embeddings: **{settings.EMBEDDING_PROVIDER}**")
     st.write(f"Model: **{settings.EMBEDDING_MODEL}**")
     st.write(f"LLM: **{settings.LLM_PROVIDER}**")
+    st.write(f"Re-ranker: **{settings.RERANK_PROVIDER}**")
     TOP_K = settings.TOP_K
     MAX_CONTEXT_CHARS = settings.MAX_CONTEXT_CHARS
 
 # --- Vector store + auto-index la pornire (doar dacă nu există index)
-vs = VectorStore(index_dir=INDEX_DIR)
+vs = open_store()
 if not vs.exists():
     bundled = sample_pdfs()
     if bundled:
         with st.spinner(f"Building first index from bundled PDFs ({len(bundled)} docs)…"):
             docs = ingest_pdfs(bundled, default_meta={"doc_type": "Bundled"})
             vs.build_or_update(docs)
+        load_retriever.clear()
         st.success(f"Bundled PDFs indexed: {len(docs)} chunks from {len(bundled)} files.")
     else:
         st.info("Nu am găsit PDF-uri în `data/samples/`. Adaugă fișiere acolo sau folosește upload (dacă păstrezi secțiunea).")
@@ -68,15 +86,22 @@ if st.button("Rebuild index from data/samples/ (no upload)"):
             # șterge indexul vechi pentru a evita dublarea
             shutil.rmtree(INDEX_DIR, ignore_errors=True)
             ensure_dirs(INDEX_DIR)
-            _vs = VectorStore(index_dir=INDEX_DIR)
+            _vs = open_store()
             docs = ingest_pdfs(bundled, default_meta={"doc_type": "Bundled"})
             _vs.build_or_update(docs)
+        load_retriever.clear()  # store-ul din cache încă ține indexul vechi în memorie
         st.success(f"Rebuilt. Indexed {len(docs)} chunks from {len(bundled)} files.")
 
 # --- Q&A section
 st.markdown("### 🔎 Ask a question")
-retriever = Retriever(VectorStore(index_dir=INDEX_DIR))
+retriever = load_retriever()
 rag = RAGChain(settings=settings)
+faq = FAQCache(OUTPUT_DIR)  # răspunsuri precalculate cu: python warm_faq.py
+
+product = None
+if settings.INDEX_SHARDED:
+    choice = st.selectbox("Produs", ["(toate)"] + retriever.vs.indexed_keys())
+    product = None if choice == "(toate)" else choice
 
 q_col, k_col, rerank_col = st.columns([6, 1, 2])
 with q_col:
@@ -90,4 +115,45 @@ if st.button("Answer"):
     if not retriever.vs.exists():
         st.error("Nu există niciun index. Asigură-te că sunt PDF-uri în `data/samples/` și apasă Rebuild.")
     elif not question.strip():
-        st.wa
+        st.warning("Scrie o întrebare.")
+    else:
+        shards = [product] if product else None
+        fingerprint = retriever.fingerprint(shards)
+        # FAQ-ul e calculat cu Top-K implicit și re-rank; cu alte setări răspundem live
+        faq_settings = int(top_k) == TOP_K and do_rerank
+        cached = faq.get(question, product, fingerprint) if faq_settings else None
+        if cached:
+            # FAQ precalculat pentru aceeași versiune a indexului – fără retrieval/LLM live
+            st.markdown(cached["answer"])
+            st.caption(
+                f"Mod: {cached['mode']} · răspuns precalculat ({cached['created_at']}) "
+                f"cu setări fixe: Top-K={TOP_K}, re-rank activ"
+            )
+            st.markdown("**Surse:**")
+            for c in cached["citations"]:
+                st.write(f"- {c['source_name']}, page {c['page']}")
+        else:
+            with Timer() as t:
+                context, hits = retriever.get_context(
+                    question, top_k=int(top_k), rerank=do_rerank,
+                    max_chars=MAX_CONTEXT_CHARS, shards=shards,
+                )
+                answer, mode = rag.answer(question, context)
+            if faq_settings and faq.known(question, product) and "fallback" not in mode:
+                # intrare FAQ învechită (s-au schimbat chunk-urile) – o reîmprospătăm
+                faq.put(question, product, fingerprint, answer, mode, hits)
+                faq.save()
+            st.markdown(answer)
+            st.caption(f"Mod: {mode} · {t.elapsed:.2f}s")
+            st.markdown("**Surse:**")
+            for h in hits:
+                meta = h["metadata"]
+                # scorul după care s-a ordonat: cross-encoder > RRF > cosinus
+                if "ce_score" in h:
+                    label, value = "rerank", h["ce_score"]
+                elif "rrf_score" in h:
+                    label, value = "rrf", h["rrf_score"]
+                else:
+                    label, value = "score", h.get("score", 0.0)
+                st.write(f"- {meta.get('source_name')}, page {meta.get('page')} ({label} {value:.4f})")
+
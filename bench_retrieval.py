@@ -0,0 +1,52 @@
+# bench_retrieval.py — latență retrieval (hibrid RRF ± cross-encoder) pe mai multe valori de candidați
+import sys
+from pathlib import Path
+
+from src.config import Settings
+from src.utils import Timer
+from src.vectorstore import VectorStore
+from src.retriever import Retriever
+from src.reranker import Reranker
+
+BASE = Path.cwd()
+INDEX = BASE / "data" / "index"
+
+QUESTIONS = [
+    "Care este perioada de grație?",
+    "Ce excluderi are polița?",
+    "Care este franșiza?",
+    "Care este acoperirea teritorială?",
+]
+CANDIDATES = [int(x) for x in sys.argv[1:]] or [10, 20, 40]
+
+
+def main():
+    settings = Settings()
+    vs = VectorStore(index_dir=INDEX)
+    if not vs.exists():
+        print("[bench] Nu există index. Rulează întâi:  python prepare_index.py")
+        return
+    retriever = Retriever(vs, reranker=Reranker(settings), rrf_k=settings.RRF_K)
+
+    # warm-up: încărcare index, BM25 și modele
+    retriever.get_context(QUESTIONS[0], top_k=settings.TOP_K)
+
+    print(f"[bench] re-ranker={settings.RERANK_PROVIDER}, budget={settings.RERANK_TIME_BUDGET_MS}ms")
+    for n in CANDIDATES:
+        hybrid = rerank = 0.0
+        with Timer() as t:
+            for q in QUESTIONS:
+                _, hits = retriever.get_context(q, top_k=settings.TOP_K, candidates=n)
+                hybrid += retriever.last_timings["hybrid_ms"]
+                rerank += retriever.last_timings["rerank_ms"]
+        k = len(QUESTIONS)
+        print(f"[bench] candidates={n:>3}  total={t.elapsed * 1000 / k:7.1f}ms/q  "
+              f"hybrid={hybrid / k:7.1f}ms/q  rerank={rerank / k:7.1f}ms/q")
+        for h in hits:
+            meta = h["metadata"]
+            print(f"          {meta.get('source_name')} p.{meta.get('page')}  "
+                  f"rrf={h.get('rrf_score', 0.0):.4f}  ce={h.get('ce_score', float('nan')):.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# index_archive.py — export/import index ca arhivă unică (provisioning rapid pe noduri noi)
+import argparse
+from pathlib import Path
+
+from src.config import Settings
+from src.utils import Timer
+from src.vectorstore import VectorStore
+from src.sharded import ShardedVectorStore
+from src.archive import export_index, import_index
+
+BASE = Path.cwd()
+INDEX = BASE / "data" / "index"
+
+
+def _export(index_dir: Path, archive: Path, confirm_model: bool) -> bool:
+    vs = VectorStore(index_dir=index_dir)
+    if not vs.exists():
+        print(f"[archive] Nu există index în {index_dir}.")
+        return False
+    try:
+        manifest = export_index(vs, archive, model_confirmed=confirm_model)
+    except ValueError as e:
+        print(f"[archive] {e}. Rulează din nou cu --confirm-model dacă modelul din .env e cel corect.")
+        return False
+    print(f"[archive] Exportat {manifest['count']} chunk-uri (dim {manifest['dim']}, "
+          f"{manifest['embedding_model']}) -> {archive}")
+    return True
+
+
+def _import(archive: Path, index_dir: Path, settings: Settings, verify: bool):
+    manifest = import_index(archive, index_dir, settings=settings, verify=verify)
+    print(f"[archive] Importat {manifest['count']} chunk-uri (dim {manifest['dim']}) în {index_dir}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Export/import index (tar versionat, sha256, fără pickle).")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    ex = sub.add_parser("export", help="scrie indexul local într-o arhivă")
+    ex.add_argument("archive", help="fișierul de ieșire (ex. index.tar); cu index shard-uit, un director")
+    ex.add_argument("--confirm-model", action="store_true",
+                    help="indexul vechi (fără index.tar) a fost construit cu EMBEDDING_MODEL din .env")
+    im = sub.add_parser("import", help="instalează o arhivă ca index servit prin mmap")
+    im.add_argument("archive", help="arhiva produsă de export; cu index shard-uit, directorul cu <shard>.tar")
+    im.add_argument("--no-verify", action="store_true", help="sare peste verificarea sha256")
+    for p in (ex, im):
+        p.add_argument("--shard", help="un singur shard (data/index/<shard>/), cu INDEX_SHARDED=true")
+    args = ap.parse_args()
+
+    settings = Settings()
+    archive = Path(args.archive)
+    # index shard-uit fără --shard: câte o arhivă <shard>.tar per shard, în directorul dat
+    all_shards = settings.INDEX_SHARDED and not args.shard
+    index_dir = INDEX / args.shard if args.shard else INDEX
+
+    with Timer() as t:
+        if args.cmd == "export" and all_shards:
+            keys = ShardedVectorStore(index_dir=INDEX, settings=settings).indexed_keys()
+            if not keys:
+                print(f"[archive] Nu există shard-uri indexate în {INDEX}.")
+                return
+            archive.mkdir(parents=True, exist_ok=True)
+            done = sum(_export(INDEX / k, archive / f"{k}.tar", args.confirm_model) for k in keys)
+            print(f"[archive] {done}/{len(keys)} shard-uri exportate în {archive}")
+        elif args.cmd == "export":
+            _export(index_dir, archive, args.confirm_model)
+        elif all_shards:
+            tars = sorted(archive.glob("*.tar")) if archive.is_dir() else []
+            if not tars:
+                print(f"[archive] Cu INDEX_SHARDED=true, {archive} trebuie să fie un director cu <shard>.tar "
+                      f"(sau folosește --shard).")
+                return
+            for tar in tars:
+                _import(tar, INDEX / tar.stem, settings, verify=not args.no_verify)
+            print(f"[archive] {len(tars)} shard-uri importate în {INDEX}")
+        else:
+            _import(archive, index_dir, settings, verify=not args.no_verify)
+    print(f"[archive] Gata în {t.elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
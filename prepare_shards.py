@@ -0,0 +1,67 @@
+from pathlib import Path
+from glob import glob
+import sys
+import time
+import traceback
+
+from src.config import Settings
+from src.utils import ensure_dirs
+from src.sharded import ShardedVectorStore, shard_key_for
+from src.ingest import stream_pdf_chunks
+
+BASE = Path.cwd()
+DATA = BASE / "data"
+SAMPLES = DATA / "samples"
+INDEX = DATA / "index"
+
+DEFAULT_META = {"doc_type": "Bundled"}
+
+
+def main():
+    """
+    Construiește indexul shard-uit (un shard per produs/asigurător).
+    Fără argumente reconstruiește toate shard-urile; altfel doar pe cele date:
+        python prepare_shards.py IPID_My_Car IPID_SanaPlan
+    """
+    settings = Settings()
+    pdfs = sorted(glob(str(SAMPLES / "*.pdf")))
+    if not pdfs:
+        print("[shards] Nu există PDF-uri în data/samples/.")
+        return
+
+    ensure_dirs(INDEX)
+    store = ShardedVectorStore(index_dir=INDEX, settings=settings)
+
+    # grupăm PDF-urile pe cheia de shard (mai multe PDF-uri pot ajunge în același shard)
+    groups = {}
+    for pdf in pdfs:
+        meta = dict(DEFAULT_META, source_name=Path(pdf).name)
+        groups.setdefault(shard_key_for(meta, store.shard_by), []).append(pdf)
+
+    wanted = sys.argv[1:] or sorted(groups)
+    unknown = [k for k in wanted if k not in groups]
+    if unknown:
+        print(f"[shards] Shard-uri necunoscute: {', '.join(unknown)}. Disponibile: {', '.join(sorted(groups))}")
+        return
+
+    failed = []
+    for i, key in enumerate(wanted, start=1):
+        print(f"\n[shards] ({i}/{len(wanted)}) -> {key} ({len(groups[key])} PDF)")
+        t0 = time.time()
+        try:
+            docs = (c for pdf in groups[key] for c in stream_pdf_chunks(pdf, default_meta=DEFAULT_META))
+            store.rebuild_shard(key, docs, batch_size=48)
+            print(f"[shards]    ✓ Reconstruit în {time.time() - t0:.1f}s")
+        except Exception as e:
+            print(f"[shards]    ✗ Eroare la {key}: {e}")
+            traceback.print_exc(limit=1)
+            failed.append(key)
+
+    print(f"\n[shards] Shard-uri OK: {len(wanted) - len(failed)}/{len(wanted)}")
+    if failed:
+        print(f"[shards] Shard-uri cu erori: {', '.join(failed)}")
+    print("[shards] Setează INDEX_SHARDED=true în .env și pornește:  streamlit run app.py")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+# src/archive.py — export/import index ca arhivă unică, versionată, cu checksum, fără pickle
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, Iterable, Iterator
+import hashlib
+import io
+import json
+import os
+import shutil
+import tarfile
+import time
+import numpy as np
+
+from .config import Settings
+from .vectorstore import VectorStore, ARCHIVE_FILE, META_FILE, EMB_FILE, DOC_FILE
+
+ARCHIVE_FORMAT = "insure-doc-index"
+ARCHIVE_VERSION = 1
+
+# membrii arhivei (tar necomprimat -> datele pot fi mmap-uite direct din arhivă)
+MANIFEST = "manifest.json"
+A_EMB = "embeddings.f32"   # float32 little-endian, row-major (count × dim)
+A_TEXT = "texts.bin"       # textele UTF-8 concatenate
+A_OFFS = "texts.idx"       # int64 little-endian, count + 1 offseturi în texts.bin
+A_META = "meta.jsonl"      # metadata per rând, în aceeași ordine
+
+CHUNK_ROWS = 4096
+READ_BYTES = 1 << 20
+
+
+class _StreamReader(io.RawIOBase):
+    """File-like peste un iterator de bytes; calculează sha256 pe măsură ce tarfile citește."""
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks: Iterator[bytes] = iter(chunks)
+        self._buf = b""
+        self._pos = 0
+        self.sha256 = hashlib.sha256()
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, n: int = -1) -> bytes:
+        parts = []
+        while n < 0 or n > 0:
+            if self._pos >= len(self._buf):
+                chunk = next(self._chunks, None)
+                if chunk is None:
+                    break
+                self._buf, self._pos = chunk, 0
+            end = len(self._buf) if n < 0 else min(len(self._buf), self._pos + n)
+            parts.append(self._buf[self._pos:end])
+            if n > 0:
+                n -= end - self._pos
+            self._pos = end
+        out = b"".join(parts)
+        self.sha256.update(out)
+        return out
+
+
+def _add_stream(tar: tarfile.TarFile, name: str, size: int, chunks: Iterable[bytes]) -> Dict:
+    info = tarfile.TarInfo(name)
+    info.size = size
+    info.mtime = int(time.time())
+    reader = _StreamReader(chunks)
+    tar.addfile(info, reader)
+    return {"size": size, "sha256": reader.sha256.hexdigest()}
+
+
+class TextColumn:
+    """Textele servite din arhivă: texts.bin + texts.idx mmap-uite, decodate la cerere."""
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        self._blob = blob
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        start, end = int(self._offsets[i]), int(self._offsets[i + 1])
+        return bytes(self._blob[start:end]).decode("utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(len(self)):
+            yield self[i]
+
+
+def _memmap_member(archive_path: Path, member: tarfile.TarInfo, dtype: str, shape) -> np.ndarray:
+    if member.size == 0:
+        return np.zeros(shape, dtype=dtype)
+    return np.memmap(archive_path, dtype=dtype, mode="r", offset=member.offset_data, shape=shape)
+
+
+def load_archive(archive_path: Path):
+    """(embeddings, texts, metas) direct din arhivă: embeddings și textele rămân pe disc (mmap)."""
+    manifest = read_manifest(archive_path)
+    count, dim = manifest["count"], manifest["dim"]
+    with tarfile.open(archive_path, "r:") as tar:
+        emb = _memmap_member(archive_path, tar.getmember(A_EMB), "<f4", (count, dim))
+        texts = TextColumn(
+            _memmap_member(archive_path, tar.getmember(A_TEXT), "u1", (tar.getmember(A_TEXT).size,)),
+            _memmap_member(archive_path, tar.getmember(A_OFFS), "<i8", (count + 1,)),
+        )
+        f = io.TextIOWrapper(tar.extractfile(A_META), encoding="utf-8")
+        metas = [json.loads(line) for line in f]
+    return emb, texts, metas
+
+
+def _source_arrays(vs: VectorStore):
+    """(embeddings, texts, metas) din store, embeddings mmap-uite unde se poate."""
+    if vs.archive_path.exists():
+        return vs._load_all()
+    emb = np.load(vs.emb_path, mmap_mode="r")
+    # documents.npy e formatul vechi (pickle); e fișierul nostru local, deci îl putem citi
+    docs = np.load(vs.doc_path, allow_pickle=True)
+    with vs.meta_path.open("r", encoding="utf-8") as f:
+        metas = [json.loads(line) for line in f]
+    return emb, docs, metas
+
+
+def export_index(vs: VectorStore, out_path: Path, chunk_rows: int = CHUNK_ROWS,
+                 model_confirmed: bool = False) -> Dict:
+    """
+    Scrie indexul din `vs` într-o singură arhivă; embeddings și textele sunt scrise în bucăți.
+    Un index importat păstrează modelul din manifestul lui. Layout-ul vechi (3 fișiere) nu
+    reține modelul, deci îl ia din .env doar dacă apelantul confirmă (model_confirmed).
+    """
+    if not vs.exists():
+        raise FileNotFoundError(f"No index in {vs.index_dir}")
+    if vs.archive_path.exists():
+        source = read_manifest(vs.archive_path)
+        provider, model = source["embedding_provider"], source["embedding_model"]
+    elif model_confirmed:
+        provider, model = vs.settings.EMBEDDING_PROVIDER, vs.settings.EMBEDDING_MODEL
+    else:
+        raise ValueError(
+            f"Index in {vs.index_dir} does not record its embedding model; confirm it was built with "
+            f"{vs.settings.EMBEDDING_PROVIDER}:{vs.settings.EMBEDDING_MODEL} before exporting"
+        )
+    emb, docs, metas = _source_arrays(vs)
+    count, dim = int(emb.shape[0]), int(emb.shape[1])
+    if not (len(docs) == len(metas) == count):
+        raise ValueError(f"Index out of sync: {count} embeddings, {len(docs)} texts, {len(metas)} metas")
+
+    def _emb_chunks():
+        for s in range(0, count, chunk_rows):
+            yield np.ascontiguousarray(emb[s:s + chunk_rows], dtype="<f4").tobytes()
+
+    def _text_chunks():
+        for s in range(0, count, chunk_rows):
+            yield b"".join(str(t).encode("utf-8") for t in docs[s:s + chunk_rows])
+
+    # primul pas: offseturile (tar cere dimensiunea fiecărui membru în header)
+    offsets = np.zeros(count + 1, dtype="<i8")
+    for i, t in enumerate(docs):
+        offsets[i + 1] = offsets[i] + len(str(t).encode("utf-8"))
+
+    meta_bytes = [(json.dumps(m, ensure_ascii=False) + "\n").encode("utf-8") for m in metas]
+
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out_path.with_name(out_path.name + ".tmp")
+    members: Dict[str, Dict] = {}
+    with tarfile.open(tmp, "w", format=tarfile.PAX_FORMAT) as tar:
+        members[A_EMB] = _add_stream(tar, A_EMB, count * dim * 4, _emb_chunks())
+        members[A_TEXT] = _add_stream(tar, A_TEXT, int(offsets[-1]), _text_chunks())
+        members[A_OFFS] = _add_stream(tar, A_OFFS, offsets.nbytes, [offsets.tobytes()])
+        members[A_META] = _add_stream(tar, A_META, sum(len(b) for b in meta_bytes), meta_bytes)
+        manifest = {
+            "format": ARCHIVE_FORMAT,
+            "version": ARCHIVE_VERSION,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "embedding_provider": provider,
+            "embedding_model": model,
+            "dim": dim,
+            "count": count,
+            "members": members,
+        }
+        raw = json.dumps(manifest, ensure_ascii=False, indent=2).encode("utf-8")
+        _add_stream(tar, MANIFEST, len(raw), [raw])
+    os.replace(tmp, out_path)
+    return manifest
+
+
+def read_manifest(archive_path: Path) -> Dict:
+    with tarfile.open(archive_path, "r:") as tar:
+        manifest = json.load(tar.extractfile(MANIFEST))
+    if manifest.get("format") != ARCHIVE_FORMAT:
+        raise ValueError(f"Not an index archive: {archive_path}")
+    if manifest.get("version") != ARCHIVE_VERSION:
+        raise ValueError(f"Unsupported archive version {manifest.get('version')} (expected {ARCHIVE_VERSION})")
+    return manifest
+
+
+def verify_archive(archive_path: Path) -> Dict:
+    """Verifică manifestul, membrii obligatorii, dimensiunile și sha256 pentru fiecare membru (citire în bucăți)."""
+    manifest = read_manifest(archive_path)
+    count, dim = manifest["count"], manifest["dim"]
+    missing = [name for name in (A_EMB, A_TEXT, A_OFFS, A_META) if name not in manifest["members"]]
+    if missing:
+        raise ValueError(f"Archive is missing members: {', '.join(missing)}")
+    expected = {A_EMB: count * dim * 4, A_OFFS: (count + 1) * 8}
+    with tarfile.open(archive_path, "r:") as tar:
+        for name, info in manifest["members"].items():
+            member = tar.getmember(name)
+            if member.size != info["size"] or expected.get(name, member.size) != member.size:
+                raise ValueError(f"Archive member {name} has wrong size")
+            h = hashlib.sha256()
+            f = tar.extractfile(member)
+            for block in iter(lambda: f.read(READ_BYTES), b""):
+                h.update(block)
+            if h.hexdigest() != info["sha256"]:
+                raise ValueError(f"Checksum mismatch for {name}")
+        # ultimul offset din texts.idx trebuie să fie exact lungimea lui texts.bin
+        f = tar.extractfile(A_OFFS)
+        f.seek(count * 8)
+        last = int(np.frombuffer(f.read(8), dtype="<i8")[0])
+        if last != tar.getmember(A_TEXT).size:
+            raise ValueError(f"{A_TEXT} size does not match the last offset in {A_OFFS}")
+    return manifest
+
+
+def import_index(archive_path: Path, index_dir: Path, settings: Settings | None = None,
+                 verify: bool = True) -> Dict:
+    """
+    Instalează arhiva ca index servit direct din ea (index.tar în index_dir, mmap la căutare).
+    Refuză arhivele construite cu alt model de embedding decât cel configurat.
+    """
+    settings = settings or Settings()
+    archive_path = Path(archive_path)
+    manifest = verify_archive(archive_path) if verify else read_manifest(archive_path)
+    # Embedder normalizează providerul la lowercase
+    if (manifest["embedding_provider"].lower(), manifest["embedding_model"]) != \
+            ((settings.EMBEDDING_PROVIDER or "local").lower(), settings.EMBEDDING_MODEL):
+        raise ValueError(
+            f"Archive was built with {manifest['embedding_provider']}:{manifest['embedding_model']}, "
+            f"configured is {settings.EMBEDDING_PROVIDER}:{settings.EMBEDDING_MODEL}"
+        )
+
+    index_dir = Path(index_dir)
+    index_dir.mkdir(parents=True, exist_ok=True)
+    target = index_dir / ARCHIVE_FILE
+    if archive_path.resolve() != target.resolve():
+        tmp = target.with_name(target.name + ".tmp")
+        shutil.copyfile(archive_path, tmp)
+        os.replace(tmp, target)
+    # arhiva înlocuiește layout-ul vechi (3 fișiere) din același director
+    for name in (META_FILE, EMB_FILE, DOC_FILE):
+        (index_dir / name).unlink(missing_ok=True)
+    return manifest
@@ -8,6 +8,23 @@ class Settings(BaseSettings):
     TOP_K: int = 5
     MAX_CONTEXT_CHARS: int = 6000
 
+    # Re-ranking (hibrid RRF + cross-encoder opțional)
+    RRF_K: int = 60
+    RERANK_PROVIDER: str = "none"      # none | cross-encoder
+    RERANK_MODEL: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    RERANK_CANDIDATES: int = 20
+    RERANK_TIME_BUDGET_MS: int = 0     # 0 = fără limită
+    RERANK_BATCH_SIZE: int = 32
+
+    # Index shard-uit (un VectorStore per asigurător/produs)
+    INDEX_SHARDED: bool = False
+    SHARD_BY: str = "source_name"      # source_name | doc_type
+    MAX_LOADED_SHARDS: int = 8
+    SHARD_WORKERS: int = 4
+
+    # Warm-up FAQ (răspunsuri precalculate)
+    FAQ_WORKERS: int = 4               # apeluri LLM în paralel
+
     # Pydantic v2 style
     model_config = SettingsConfigDict(
         env_file=".env",
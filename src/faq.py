@@ -0,0 +1,198 @@
+# src/faq.py — răspunsuri FAQ precalculate (warm-up offline) + lookup pentru app
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+import contextlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+from .rag_chain import RAGChain
+from .retriever import Retriever
+from .utils import clean_text
+
+FAQ_FILE = "faq_cache.jsonl"
+
+# întrebările pe care agenții le pun la fiecare produs
+DEFAULT_QUESTIONS = [
+    "Care este perioada de grație?",
+    "Care sunt excluderile?",
+    "Care este franșiza?",
+    "Care este acoperirea teritorială?",
+    "Ce riscuri sunt acoperite?",
+    "Care sunt obligațiile asiguratului în caz de daună?",
+]
+
+
+def normalize_question(question: str) -> str:
+    return clean_text(question).lower().rstrip(" ?!.")
+
+
+@contextlib.contextmanager
+def _file_lock(path: Path, timeout: float = 30.0, stale: float = 120.0):
+    """Lock între procese (app + warm_faq.py) printr-un fișier .lock creat exclusiv; merge și pe Windows."""
+    lock = path.with_name(path.name + ".lock")
+    t0 = time.time()
+    while True:
+        try:
+            os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            break
+        except FileExistsError:
+            try:
+                if time.time() - lock.stat().st_mtime > stale:
+                    # lock rămas de la un proces oprit brusc
+                    lock.unlink(missing_ok=True)
+                    continue
+            except FileNotFoundError:
+                continue
+            if time.time() - t0 > timeout:
+                raise TimeoutError(f"Could not lock {path}")
+            time.sleep(0.05)
+    try:
+        yield
+    finally:
+        lock.unlink(missing_ok=True)
+
+
+class FAQCache:
+    """
+    Lookup persistent (faq_cache.jsonl) cu răspunsuri precalculate, cheie (întrebare, produs).
+    Fiecare intrare reține amprenta indexului din momentul calculului; dacă între timp
+    chunk-urile s-au schimbat, get() nu o mai întoarce și warm-up-ul o recalculează.
+    Mai multe procese pot scrie același fișier: save() combină intrările de pe disc
+    cu cele puse local, sub un lock de fișier.
+    """
+    def __init__(self, output_dir: Path):
+        self.path = Path(output_dir) / FAQ_FILE
+        self._entries: Dict[Tuple[str, str], Dict] | None = None
+        self._dirty: Dict[Tuple[str, str], Dict] = {}  # puse local, încă nescrise pe disc
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(question: str, product: Optional[str]) -> Tuple[str, str]:
+        return normalize_question(question), product or ""
+
+    def _read_file(self) -> Dict[Tuple[str, str], Dict]:
+        entries: Dict[Tuple[str, str], Dict] = {}
+        if self.path.exists():
+            with self.path.open("r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        e = json.loads(line)
+                        entries[self._key(e["question"], e.get("product"))] = e
+        return entries
+
+    def _load(self) -> Dict[Tuple[str, str], Dict]:
+        if self._entries is None:
+            self._entries = self._read_file()
+        return self._entries
+
+    def known(self, question: str, product: Optional[str] = None) -> bool:
+        with self._lock:
+            return self._key(question, product) in self._load()
+
+    def get(self, question: str, product: Optional[str], fingerprint: int) -> Optional[Dict]:
+        with self._lock:
+            e = self._load().get(self._key(question, product))
+        if e is None or e.get("fingerprint") != fingerprint:
+            return None
+        return e
+
+    def put(self, question: str, product: Optional[str], fingerprint: int,
+            answer: str, mode: str, hits: List[Dict]):
+        entry = {
+            "question": question,
+            "product": product or "",
+            "fingerprint": fingerprint,
+            "answer": answer,
+            "mode": mode,
+            "citations": [
+                {"source_name": h["metadata"].get("source_name"), "page": h["metadata"].get("page")}
+                for h in hits
+            ],
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        key = self._key(question, product)
+        with self._lock:
+            self._load()[key] = entry
+            self._dirty[key] = entry
+
+    def save(self):
+        """Scrie doar intrările puse local peste ce e acum pe disc (nu peste snapshot-ul nostru)."""
+        with self._lock:
+            dirty = dict(self._dirty)
+        if not dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with _file_lock(self.path):
+            merged = self._read_file()
+            merged.update(dirty)
+            # fișier temporar unic per proces, apoi înlocuire atomică
+            with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=self.path.parent,
+                                             prefix=self.path.name + ".", suffix=".tmp",
+                                             delete=False) as f:
+                for e in merged.values():
+                    f.write(json.dumps(e, ensure_ascii=False) + "\n")
+            os.replace(f.name, self.path)
+        with self._lock:
+            for key, entry in dirty.items():
+                if self._dirty.get(key) is entry:
+                    del self._dirty[key]
+            # ce s-a pus între timp rămâne dirty și are prioritate față de disc
+            merged.update(self._dirty)
+            self._entries = merged
+
+
+def warm_up(retriever: Retriever, rag: RAGChain, cache: FAQCache,
+            questions: List[str], products: Iterable[Optional[str]] = (None,),
+            top_k: int = 5, max_chars: int = 6000, workers: int = 4, force: bool = False) -> Dict[str, int]:
+    """
+    Calculează răspunsurile pentru matricea întrebări × produse:
+      - sare peste intrările deja valide (aceeași amprentă a indexului), dacă nu e force
+      - sare peste produsele fără index (amprentă 0: shard inexistent sau gol)
+        și peste întrebările pentru care retrieval-ul nu găsește nimic
+      - retrieval în batch per produs, apoi LLM concurent cu cel mult `workers` apeluri în paralel
+    """
+    stats = {"fresh": 0, "computed": 0, "failed": 0, "skipped": 0}
+    jobs = []  # (question, product, fingerprint, context, hits)
+    for product in products:
+        shards = [product] if product else None
+        fingerprint = retriever.fingerprint(shards)
+        if not fingerprint:
+            stats["skipped"] += len(questions)
+            continue
+        todo = [q for q in questions if force or cache.get(q, product, fingerprint) is None]
+        stats["fresh"] += len(questions) - len(todo)
+        if not todo:
+            continue
+        results = retriever.get_contexts(todo, top_k=top_k, max_chars=max_chars, shards=shards)
+        for q, (context, hits) in zip(todo, results):
+            if not hits:
+                # fără context nu fixăm în cache un răspuns gol
+                stats["skipped"] += 1
+                continue
+            jobs.append((q, product, fingerprint, context, hits))
+
+    def _answer(job):
+        q, product, fingerprint, context, hits = job
+        answer, mode = rag.answer(q, context)
+        if "fallback" in mode:
+            # LLM-ul a căzut: nu fixăm în cache un răspuns degradat
+            raise RuntimeError(f"LLM failed for: {q}")
+        cache.put(q, product, fingerprint, answer, mode, hits)
+        return mode
+
+    if jobs:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for fut in [pool.submit(_answer, j) for j in jobs]:
+                try:
+                    fut.result()
+                    stats["computed"] += 1
+                except Exception:
+                    stats["failed"] += 1
+        cache.save()
+    return stats
@@ -0,0 +1,92 @@
+# src/reranker.py — re-ranking în două etape (RRF hibrid + cross-encoder local)
+from typing import Dict, List, Optional, Sequence
+import time
+
+from .config import Settings
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[int]], k: int = 60) -> Dict[int, float]:
+    """
+    Reciprocal Rank Fusion: fiecare listă contribuie 1 / (k + rang) pentru fiecare id.
+    Nu depinde de scala scorurilor (cosine în [0,1] vs BM25 nemărginit), doar de ordine.
+    """
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return fused
+
+
+class Reranker:
+    """
+    Re-ranker cu cross-encoder local (sentence-transformers), rulat pe CPU
+    într-un singur apel batch peste top-N candidați.
+      - provider "none" -> re-rankerul e dezactivat (enabled == False)
+      - time_budget_ms > 0 -> numărul de candidați e redus ca să încapă în buget,
+        pe baza latenței per candidat măsurate la apelurile anterioare
+    """
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.provider = (settings.RERANK_PROVIDER or "none").lower()
+        self.model_name = settings.RERANK_MODEL or "cross-encoder/ms-marco-MiniLM-L-6-v2"
+        self.candidates = max(1, int(settings.RERANK_CANDIDATES))
+        self.time_budget_ms = max(0, int(settings.RERANK_TIME_BUDGET_MS))
+        self.batch_size = max(1, int(settings.RERANK_BATCH_SIZE))
+        self._model = None
+        self._ms_per_pair: Optional[float] = None  # EMA a latenței per pereche (query, pasaj)
+        self.last_timing_ms = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.provider != "none"
+
+    def _ensure_model(self):
+        if self.provider == "cross-encoder":
+            if self._model is None:
+                from sentence_transformers import CrossEncoder
+                self._model = CrossEncoder(self.model_name, device="cpu")
+        else:
+            raise ValueError(f"Unknown rerank provider: {self.provider}")
+
+    def budgeted_candidates(self, requested: Optional[int] = None, spent_ms: float = 0.0) -> int:
+        """Câți candidați putem trimite la cross-encoder în bugetul de timp rămas."""
+        n = max(1, int(requested or self.candidates))
+        if not self.time_budget_ms or self._ms_per_pair is None:
+            return n
+        remaining = self.time_budget_ms - spent_ms
+        if remaining <= 0:
+            return 0
+        return max(0, min(n, int(remaining / max(self._ms_per_pair, 1e-3))))
+
+    def rerank(self, question: str, hits: List[Dict], top_n: Optional[int] = None,
+               spent_ms: float = 0.0) -> List[Dict]:
+        """
+        Re-ordonează primii N candidați după scorul cross-encoderului (ce_score).
+        Candidații care nu au încăput în buget rămân după cei re-ordonați, în ordinea inițială.
+        """
+        self.last_timing_ms = 0.0
+        if not hits or not self.enabled:
+            return hits
+        n = min(len(hits), self.budgeted_candidates(top_n, spent_ms=spent_ms))
+        if n <= 1:
+            return hits
+
+        self._ensure_model()
+        head, tail = hits[:n], hits[n:]
+        pairs = [(question, h["text"]) for h in head]
+
+        t0 = time.perf_counter()
+        scores = self._model.predict(
+            pairs,
+            batch_size=self.batch_size,
+            show_progress_bar=False,
+            convert_to_numpy=True,
+        )
+        self.last_timing_ms = (time.perf_counter() - t0) * 1000.0
+        per_pair = self.last_timing_ms / len(pairs)
+        self._ms_per_pair = per_pair if self._ms_per_pair is None else 0.7 * self._ms_per_pair + 0.3 * per_pair
+
+        for h, s in zip(head, scores):
+            h["ce_score"] = float(s)
+        head.sort(key=lambda x: x["ce_score"], reverse=True)
+        return head + tail
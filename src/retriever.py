@@ -1,46 +1,183 @@
-from typing import List, Dict, Tuple
+from itertools import chain
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple, Union
 from rank_bm25 import BM25Okapi
+import heapq
 import re
+import threading
+import time
+import numpy as np
 
-from .vectorstore import VectorStore
+from .vectorstore import VectorStore, embed_queries
+from .sharded import ShardedVectorStore
+from .reranker import Reranker, reciprocal_rank_fusion
 
 class Retriever:
-    def __init__(self, vs: VectorStore):
+    def __init__(self, vs: Union[VectorStore, ShardedVectorStore], reranker: Optional[Reranker] = None,
+                 rrf_k: int = 60):
         self.vs = vs
-        self._bm25_cache = None
-
-    def _prepare_bm25(self):
-        # ensure meta is loaded
-        self.vs._load()
-        if self._bm25_cache is not None:
-            return self._bm25_cache
-        if not self.vs.exists():
-            self._bm25_cache = ([], None)
-            return self._bm25_cache
-        texts = [d["text"] for d in self.vs._meta]
-        tokenized = [re.findall(r"\w+", t.lower()) for t in texts]
-        bm25 = BM25Okapi(tokenized)
-        self._bm25_cache = (texts, bm25)
-        return self._bm25_cache
-
-    def get_context(self, question: str, top_k: int = 5, rerank: bool = True, max_chars: int = 6000):
-        # semantic retrieve
-        sem_hits = self.vs.search(question, top_k=top_k * 3 if rerank else top_k)
-        hits = sem_hits
-        if rerank:
-            texts, bm25 = self._prepare_bm25()
-            if bm25 and texts:
-                scores = bm25.get_scores(re.findall(r"\w+", question.lower()))
-                # attach lexical scores
-                for h in hits:
-                    try:
-                        i = self.vs._meta.index({"text": h["text"], "metadata": h["metadata"]})
-                    except ValueError:
-                        i = None
-                    h["lex_score"] = float(scores[i]) if i is not None else 0.0
-                # sort hybrid: semantic + 0.2 * lexical
-                hits.sort(key=lambda x: (x.get("score", 0.0) + 0.2 * x.get("lex_score", 0.0)), reverse=True)
+        self.reranker = reranker
+        self.rrf_k = rrf_k
+        # BM25 per store (cheie None pentru indexul plat, cheia de shard altfel)
+        # (doar modelul; textele se citesc din store, ca un index mmap-uit să nu fie copiat în memorie)
+        self._bm25_cache: Dict[Optional[str], Tuple[int, BM25Okapi]] = {}
+        # app.py partajează un singur Retriever între sesiuni (st.cache_resource)
+        self._bm25_lock = threading.Lock()
+        self.last_timings: Dict[str, float] = {}
 
+    def _store_batches(self, shards: Optional[Iterable[str]] = None) -> Iterator[List[Tuple[Optional[str], VectorStore]]]:
+        if isinstance(self.vs, ShardedVectorStore):
+            yield from self.vs.shard_batches(shards)
+        elif self.vs.exists():
+            yield [(None, self.vs)]
+
+    def _prune_bm25(self):
+        # BM25 nu se descarcă odată cu vectorii (ar trebui re-tokenizat tot corpusul la fiecare
+        # căutare pe toate shard-urile); renunțăm doar la shard-urile care nu mai au index
+        if isinstance(self.vs, ShardedVectorStore):
+            indexed = set(self.vs.indexed_keys())
+            with self._bm25_lock:
+                for key in [k for k in self._bm25_cache if k not in indexed]:
+                    self._bm25_cache.pop(key, None)
+
+    def fingerprint(self, shards: Optional[Iterable[str]] = None) -> int:
+        """Versiunea indexului (sau a shard-urilor selectate); se schimbă când se rescriu chunk-urile."""
+        if isinstance(self.vs, ShardedVectorStore):
+            return self.vs.version(shards)
+        return self.vs.version()
+
+    def _prepare_bm25(self, key: Optional[str], version: int, docs) -> Tuple[int, Optional[BM25Okapi]]:
+        # BM25 construit din exact aceleași texte (și versiune) pe care le servește store-ul
+        with self._bm25_lock:
+            cached = self._bm25_cache.get(key)
+        if cached is not None and cached[0] == version:
+            return cached
+        # construit în afara lock-ului; două sesiuni pot construi același model, rezultatul e identic
+        tokenized = [re.findall(r"\w+", str(t).lower()) for t in docs]
+        cached = (version, BM25Okapi(tokenized) if tokenized else None)
+        with self._bm25_lock:
+            self._bm25_cache[key] = cached
+        return cached
+
+    def _semantic_batch(self, batch: List[Tuple[Optional[str], VectorStore]], q_mat: np.ndarray,
+                        n: int) -> List[List[Dict]]:
+        if isinstance(self.vs, ShardedVectorStore):
+            return self.vs.search_batch(batch, q_mat, top_k=n)
+        return batch[0][1].search_vectors(q_mat, top_k=n)
+
+    def _lexical_batch(self, tokens: List[List[str]], batch: List[Tuple[Optional[str], VectorStore]],
+                       n: int) -> List[List[Dict]]:
+        """Top-N BM25 per întrebare pe un lot de store-uri."""
+        found: List[List[Dict]] = [[] for _ in tokens]
+        for key, store in batch:
+            # ensure texts are loaded (și reîncărcate, dacă indexul s-a schimbat pe disc)
+            _, docs, metas = store._load_all()
+            _, bm25 = self._prepare_bm25(key, store.loaded_version(), docs)
+            if bm25 is None:
+                continue
+            for q, q_tokens in enumerate(tokens):
+                scores = bm25.get_scores(q_tokens)
+                if n >= len(scores):
+                    lex_idx = np.argsort(-scores)
+                else:
+                    lex_idx = np.argpartition(-scores, n)[:n]
+                for i in lex_idx:
+                    i = int(i)
+                    if scores[i] <= 0:
+                        continue
+                    hit = {
+                        "text": str(docs[i]),
+                        "metadata": metas[i],
+                        "score": 0.0,
+                        "idx": i if key is None else (key, i),
+                        "lex_score": float(scores[i]),
+                    }
+                    if key is not None:
+                        hit["shard"] = key
+                    found[q].append(hit)
+        return [heapq.nlargest(n, hits, key=lambda h: h["lex_score"]) for hits in found]
+
+    def _candidates(self, questions: List[str], n_sem: int, n_lex: int,
+                    shards: Optional[Iterable[str]] = None) -> Tuple[List[List[Dict]], List[List[Dict]]]:
+        """
+        Top-N semantic și (dacă n_lex) top-N BM25 per întrebare, într-o singură trecere
+        prin loturile de shard-uri: fiecare shard e încărcat o dată pentru ambele etape.
+        """
+        sem_all: List[List[Dict]] = [[] for _ in questions]
+        lex_all: List[List[Dict]] = [[] for _ in questions]
+        tokens = [re.findall(r"\w+", q.lower()) for q in questions]
+        q_mat = None
+        for batch in self._store_batches(shards):
+            if q_mat is None:
+                # un singur apel de embedding pentru toate întrebările
+                q_mat = embed_queries(self.vs.embedder, questions)
+            sem_batch = self._semantic_batch(batch, q_mat, n_sem)
+            sem_all = [heapq.nlargest(n_sem, chain(a, b), key=lambda h: h["score"])
+                       for a, b in zip(sem_all, sem_batch)]
+            if n_lex:
+                lex_batch = self._lexical_batch(tokens, batch, n_lex)
+                lex_all = [heapq.nlargest(n_lex, chain(a, b), key=lambda h: h["lex_score"])
+                           for a, b in zip(lex_all, lex_batch)]
+        self._prune_bm25()
+        return sem_all, lex_all
+
+    def _hybrid_candidates(self, sem_hits: List[Dict], lex_hits: List[Dict], n: int) -> List[Dict]:
+        """Top-N semantic + top-N BM25, fuzionate prin Reciprocal Rank Fusion."""
+        if not lex_hits:
+            return sem_hits
+
+        by_idx = {h["idx"]: h for h in lex_hits}
+        by_idx.update({h["idx"]: h for h in sem_hits})
+        lex_scores = {h["idx"]: h["lex_score"] for h in lex_hits}
+        fused = reciprocal_rank_fusion(
+            [[h["idx"] for h in sem_hits], [h["idx"] for h in lex_hits]], k=self.rrf_k
+        )
+        hits = []
+        for i in sorted(fused, key=fused.get, reverse=True)[:n]:
+            h = by_idx[i]
+            h["lex_score"] = lex_scores.get(i, 0.0)
+            h["rrf_score"] = fused[i]
+            hits.append(h)
+        return hits
+
+    def get_context(self, question: str, top_k: int = 5, rerank: bool = True, max_chars: int = 6000,
+                    candidates: Optional[int] = None,
+                    shards: Optional[Iterable[str]] = None) -> Tuple[str, List[Dict]]:
+        return self.get_contexts([question], top_k=top_k, rerank=rerank, max_chars=max_chars,
+                                 candidates=candidates, shards=shards)[0]
+
+    def get_contexts(self, questions: List[str], top_k: int = 5, rerank: bool = True, max_chars: int = 6000,
+                     candidates: Optional[int] = None,
+                     shards: Optional[Iterable[str]] = None) -> List[Tuple[str, List[Dict]]]:
+        """Retrieval în batch: un singur apel de embedding pentru toate întrebările, apoi hibrid/re-rank per întrebare."""
+        use_ce = rerank and self.reranker is not None and self.reranker.enabled
+        n = candidates or (max(top_k * 3, self.reranker.candidates) if use_ce else top_k * 3)
+        if shards is not None:
+            shards = list(shards)
+        t0 = time.perf_counter()
+        sem_all, lex_all = self._candidates(questions, n if rerank else top_k, n if rerank else 0, shards=shards)
+        shared_ms = (time.perf_counter() - t0) * 1000.0 / max(1, len(questions))
+
+        out = []
+        for question, sem_hits, lex_hits in zip(questions, sem_all, lex_all):
+            t0 = time.perf_counter()
+            if rerank:
+                # hybrid retrieve (semantic + lexical, RRF)
+                hits = self._hybrid_candidates(sem_hits, lex_hits, n)
+            else:
+                hits = sem_hits
+            hybrid_ms = shared_ms + (time.perf_counter() - t0) * 1000.0
+            self.last_timings = {"hybrid_ms": hybrid_ms, "rerank_ms": 0.0}
+
+            if use_ce:
+                # second stage: cross-encoder pe top-N, în bugetul de timp rămas
+                hits = self.reranker.rerank(question, hits, top_n=n, spent_ms=hybrid_ms)
+                self.last_timings["rerank_ms"] = self.reranker.last_timing_ms
+
+            out.append(self._build_context(hits, top_k=top_k, max_chars=max_chars))
+        return out
+
+    @staticmethod
+    def _build_context(hits: List[Dict], top_k: int, max_chars: int) -> Tuple[str, List[Dict]]:
         # uniqueness by (source,page) then trim by max_chars
         seen = set()
         uniq = []
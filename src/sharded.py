@@ -0,0 +1,203 @@
+# src/sharded.py — index shard-uit: un VectorStore per asigurător/produs
+from __future__ import annotations
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import heapq
+import re
+import shutil
+import threading
+import zlib
+import numpy as np
+
+from .config import Settings
+from .embedder import Embedder
+from .vectorstore import VectorStore, embed_queries
+
+SHARD_SAFE = re.compile(r"[^\w\-]+")
+
+
+def shard_key_for(metadata: Dict, shard_by: str = "source_name") -> str:
+    """
+    Cheia de shard pentru un chunk:
+      - source_name -> numele fișierului fără extensie (ex. IPID_My_Car)
+      - doc_type    -> tipul documentului (ex. Bundled)
+    """
+    if shard_by == "source_name":
+        raw = Path(str(metadata.get("source_name") or "unknown")).stem
+    elif shard_by == "doc_type":
+        raw = str(metadata.get("doc_type") or "unknown")
+    else:
+        raise ValueError(f"Unknown shard key: {shard_by}")
+    return SHARD_SAFE.sub("_", raw).strip("_") or "unknown"
+
+
+class ShardedVectorStore:
+    """
+    Manager de shard-uri peste VectorStore, câte un sub-director per cheie în index_dir:
+      - add_batch(docs) rutează chunk-urile în shard-ul lor
+      - rebuild_shard(key, docs_iter) reconstruiește un singur shard
+      - search(query, top_k, shards) face fan-out în thread pool și
+        combină top-k cu un heap
+    Shard-urile se încarcă leneș; peste MAX_LOADED_SHARDS, cele mai vechi
+    folosite (LRU) sunt descărcate din memorie, iar o căutare pe mai multe
+    shard-uri decât limita le parcurge în loturi.
+    """
+    def __init__(self, index_dir: Path, settings: Optional[Settings] = None):
+        self.index_dir = Path(index_dir)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self.settings = settings or Settings()
+        self.shard_by = (self.settings.SHARD_BY or "source_name").lower()
+        self.max_loaded = max(1, int(self.settings.MAX_LOADED_SHARDS))
+        self.workers = max(1, int(self.settings.SHARD_WORKERS))
+        self.embedder = Embedder(self.settings)  # un singur model pentru toate shard-urile
+
+        self._stores: Dict[str, VectorStore] = {}
+        self._loaded: "OrderedDict[str, None]" = OrderedDict()  # LRU cu shard-urile din memorie
+        self._lock = threading.Lock()
+
+    # -------- shard management --------
+    def shard_keys(self) -> List[str]:
+        return sorted(p.name for p in self.index_dir.iterdir() if p.is_dir())
+
+    def exists(self) -> bool:
+        return bool(self.indexed_keys())
+
+    def indexed_keys(self) -> List[str]:
+        """Shard-urile care au efectiv un index (un director gol, ex. după un rebuild eșuat, nu contează)."""
+        return [k for k in self.shard_keys() if self.store(k).exists()]
+
+    def store(self, key: str) -> VectorStore:
+        with self._lock:
+            vs = self._stores.get(key)
+            if vs is None:
+                vs = VectorStore(self.index_dir / key, embedder=self.embedder)
+                self._stores[key] = vs
+            return vs
+
+    def _touch(self, keys: Iterable[str]):
+        """Marchează shard-urile ca folosite și descarcă LRU-ul peste limită (nu și pe cele cerute)."""
+        keys = list(keys)
+        with self._lock:
+            for k in keys:
+                self._loaded[k] = None
+                self._loaded.move_to_end(k)
+            pinned = set(keys)
+            for k in list(self._loaded):
+                if len(self._loaded) <= self.max_loaded:
+                    break
+                if k in pinned:
+                    continue
+                del self._loaded[k]
+                self._stores[k].unload()
+
+    def loaded_keys(self) -> List[str]:
+        with self._lock:
+            return list(self._loaded)
+
+    def _release(self, keys: Iterable[str]):
+        with self._lock:
+            for k in keys:
+                if self._loaded.pop(k, "absent") != "absent":
+                    self._stores[k].unload()
+
+    def shard_batches(self, shards: Optional[Iterable[str]] = None) -> Iterator[List[Tuple[str, VectorStore]]]:
+        """
+        (cheie, VectorStore) pentru shard-urile selectate (None = toate) care au index,
+        în loturi de cel mult MAX_LOADED_SHARDS. Când selecția depășește limita, fiecare
+        lot e descărcat după ce a fost folosit, ca memoria să rămână mărginită.
+        """
+        known = self.indexed_keys()
+        keys = [k for k in (known if shards is None else shards) if k in known]
+        for s in range(0, len(keys), self.max_loaded):
+            batch = keys[s:s + self.max_loaded]
+            self._touch(batch)
+            try:
+                yield [(k, self._stores[k]) for k in batch]
+            finally:
+                if len(keys) > self.max_loaded:
+                    self._release(batch)
+
+    def rebuild_shard(self, key: str, docs_iter: Iterable[Dict], batch_size: int = 64):
+        """Șterge și reconstruiește un singur shard; celelalte rămân neatinse."""
+        with self._lock:
+            old = self._stores.pop(key, None)
+            self._loaded.pop(key, None)
+        if old is not None:
+            old.unload()
+        shutil.rmtree(self.index_dir / key, ignore_errors=True)
+        self.store(key).build_from_stream(docs_iter, batch_size=batch_size)
+
+    # -------- building / adding --------
+    def add_batch(self, docs: List[Dict]):
+        groups: Dict[str, List[Dict]] = {}
+        for d in docs:
+            key = shard_key_for(d.get("metadata", {}), self.shard_by)
+            groups.setdefault(key, []).append(d)
+        for key, group in groups.items():
+            self.store(key).add_batch(group)
+
+    def build_from_stream(self, docs_iter: Iterable[Dict], batch_size: int = 64):
+        batch: List[Dict] = []
+        for d in docs_iter:
+            batch.append(d)
+            if len(batch) >= batch_size:
+                self.add_batch(batch)
+                batch.clear()
+        if batch:
+            self.add_batch(batch)
+
+    # -------- search --------
+    def version(self, shards: Optional[Iterable[str]] = None) -> int:
+        """Combină versiunile shard-urilor selectate; se schimbă când oricare e rescris. 0 = niciun index."""
+        known = self.indexed_keys()
+        keys = sorted(k for k in (known if shards is None else shards) if k in known)
+        if not keys:
+            return 0
+        return zlib.crc32("|".join(f"{k}:{self.store(k).version()}" for k in keys).encode("utf-8"))
+
+    def search(self, query: str, top_k: int = 5, shards: Optional[Iterable[str]] = None) -> List[Dict]:
+        return self.search_many([query], top_k=top_k, shards=shards)[0]
+
+    def search_many(self, queries: List[str], top_k: int = 5,
+                    shards: Optional[Iterable[str]] = None) -> List[List[Dict]]:
+        if not queries:
+            return []
+        q_mat = None
+        merged: List[List[Dict]] = [[] for _ in queries]
+        for stores in self.shard_batches(shards):
+            if q_mat is None:
+                # întrebările se embed-uiesc o singură dată, apoi fan-out pe shard-uri
+                q_mat = embed_queries(self.embedder, queries)
+            per_query = self.search_batch(stores, q_mat, top_k=top_k)
+            # păstrăm doar top-k per întrebare între loturi
+            merged = [
+                heapq.nlargest(top_k, chain(merged[q], per_query[q]), key=lambda h: h["score"])
+                for q in range(len(queries))
+            ]
+        return merged
+
+    def search_batch(self, stores: List[Tuple[str, VectorStore]], q_mat: np.ndarray,
+                     top_k: int = 5) -> List[List[Dict]]:
+        """Fan-out pe un lot de shard-uri (din shard_batches), top-k per întrebare combinat cu un heap."""
+        def _one(item):
+            key, vs = item
+            per_query = vs.search_vectors(q_mat, top_k=top_k)
+            for hits in per_query:
+                for h in hits:
+                    h["shard"] = key
+                    h["idx"] = (key, h["idx"])
+            return per_query
+
+        if len(stores) == 1:
+            per_shard = [_one(stores[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(stores))) as pool:
+                per_shard = list(pool.map(_one, stores))
+        return [
+            heapq.nlargest(top_k, chain.from_iterable(res[q] for res in per_shard), key=lambda h: h["score"])
+            for q in range(len(q_mat))
+        ]
@@ -5,6 +5,7 @@ from pathlib import Path
 from typing import List, Dict, Iterable, Tuple
 import json
 import os
+import threading
 import uuid
 import numpy as np
 
@@ -15,6 +16,7 @@ from .embedder import Embedder
 META_FILE = "meta.jsonl"
 EMB_FILE = "embeddings.npy"
 DOC_FILE = "documents.npy"  # păstrăm și textele pentru rezultate
+ARCHIVE_FILE = "index.tar"  # index importat (src/archive.py), servit read-only prin mmap
 
 
 def _normalize(mat: np.ndarray) -> np.ndarray:
@@ -23,48 +25,93 @@ def _normalize(mat: np.ndarray) -> np.ndarray:
     return mat / norms
 
 
+def embed_queries(embedder: Embedder, queries: List[str]) -> np.ndarray:
+    # un singur apel de embedding pentru toate întrebările -> (Q, d), normalizat L2
+    q_mat = np.array(embedder.embed(list(queries)), dtype=np.float32)
+    return _normalize(q_mat)
+
+
 class VectorStore:
     """
     Un vector store minimal, robust pe Windows:
       - salvează embeddings în embeddings.npy
       - salvează textele în documents.npy (array de obiecte)
       - salvează metadata per rând în meta.jsonl
+    Alternativ, un index importat cu index_archive.py (index.tar) e servit
+    direct din arhivă, prin mmap, fără pickle; un astfel de index e read-only.
     API compatibil cu restul proiectului:
       - exists()
       - build_from_stream(docs_iter, batch_size)
       - add_batch(docs)
       - search(query, top_k)
     """
-    def __init__(self, index_dir: Path):
+    def __init__(self, index_dir: Path, embedder: Embedder | None = None):
         self.index_dir = Path(index_dir)
         self.index_dir.mkdir(parents=True, exist_ok=True)
         self.settings = Settings()
-        self.embedder = Embedder(self.settings)
+        # embedderul poate fi partajat între mai multe store-uri (ex. shard-uri)
+        self.embedder = embedder or Embedder(self.settings)
 
         self.meta_path = self.index_dir / META_FILE
         self.emb_path  = self.index_dir / EMB_FILE
         self.doc_path  = self.index_dir / DOC_FILE
+        self.archive_path = self.index_dir / ARCHIVE_FILE
 
         # lazy cache în memorie (umplem la prima căutare)
         self._emb: np.ndarray | None = None
         self._docs: np.ndarray | None = None
         self._metas: List[Dict] | None = None
+        self._loaded_version = 0  # version() de pe disc când a fost umplut cache-ul
+        # încărcarea și unload() pot veni din sesiuni diferite (store partajat în app)
+        self._cache_lock = threading.RLock()
 
     # -------- persistency helpers --------
     def exists(self) -> bool:
+        if self.archive_path.exists():
+            return True
         return self.meta_path.exists() and self.emb_path.exists() and self.doc_path.exists()
 
+    def version(self) -> int:
+        """Se schimbă la fiecare scriere în index (mtime pe meta.jsonl / index.tar); 0 dacă nu există."""
+        for p in (self.archive_path, self.meta_path):
+            if p.exists():
+                return p.stat().st_mtime_ns
+        return 0
+
+    def unload(self):
+        """Eliberează cache-ul din memorie; următoarea căutare reîncarcă de pe disc."""
+        with self._cache_lock:
+            self._emb = None
+            self._docs = None
+            self._metas = None
+            self._loaded_version = 0
+
+    def loaded_version(self) -> int:
+        """Versiunea indexului din care provine cache-ul din memorie (0 dacă nu e încărcat)."""
+        return self._loaded_version
+
     def _load_all(self):
-        if self._emb is None and self.emb_path.exists():
-            self._emb = np.load(self.emb_path)
-        if self._docs is None and self.doc_path.exists():
-            self._docs = np.load(self.doc_path, allow_pickle=True)
-        if self._metas is None and self.meta_path.exists():
-            metas: List[Dict] = []
-            with self.meta_path.open("r", encoding="utf-8") as f:
-                for line in f:
-                    metas.append(json.loads(line))
-            self._metas = metas
+        with self._cache_lock:
+            # indexul a fost rescris pe disc de alt proces (prepare_*, import) -> reîncărcăm
+            version = self.version()
+            if self._loaded_version and version != self._loaded_version:
+                self.unload()
+            if self._emb is None and self.archive_path.exists():
+                from .archive import load_archive
+                self._emb, self._docs, self._metas = load_archive(self.archive_path)
+            if self._emb is None and self.emb_path.exists():
+                self._emb = np.load(self.emb_path)
+            if self._docs is None and self.doc_path.exists():
+                self._docs = np.load(self.doc_path, allow_pickle=True)
+            if self._metas is None and self.meta_path.exists():
+                metas: List[Dict] = []
+                with self.meta_path.open("r", encoding="utf-8") as f:
+                    for line in f:
+                        metas.append(json.loads(line))
+                self._metas = metas
+            if self._emb is not None:
+                self._loaded_version = version
+            return self._emb, self._docs, self._metas
 
     def _append_persist(self, vecs: np.ndarray, texts: List[str], metas: List[Dict]):
         # embeddings
@@ -90,14 +137,14 @@ class VectorStore:
                 f.write(json.dumps(m, ensure_ascii=False) + "\n")
 
         # invalidăm cache-ul din memorie (va fi reîncărcat la search)
-        self._emb = None
-        self._docs = None
-        self._metas = None
+        self.unload()
 
     # -------- building / adding --------
     def add_batch(self, docs: List[Dict]):
         if not docs:
             return
+        if self.archive_path.exists():
+            raise RuntimeError(f"{self.index_dir} is an imported (read-only) index; rebuild it to add documents")
         texts = [d["text"] for d in docs]
         metas = [d.get("metadata", {}) for d in docs]
         # calculează embeddings cu providerul configurat
@@ -117,32 +164,52 @@ class VectorStore:
             self.add_batch(batch)
 
     # -------- search --------
+    def embed_query(self, query: str) -> np.ndarray:
+        return self.embed_queries([query])[0]
+
+    def embed_queries(self, queries: List[str]) -> np.ndarray:
+        return embed_queries(self.embedder, queries)
+
     def search(self, query: str, top_k: int = 5) -> List[Dict]:
         if not self.exists():
             return []
+        return self.search_vector(self.embed_query(query), top_k=top_k)
 
-        self._load_all()
-        assert self._emb is not None and self._docs is not None and self._metas is not None
+    def search_many(self, queries: List[str], top_k: int = 5) -> List[List[Dict]]:
+        if not self.exists() or not queries:
+            return [[] for _ in queries]
+        return self.search_vectors(self.embed_queries(queries), top_k=top_k)
 
-        # embed query
-        q_vec = np.array(self.embedder.embed([query])[0], dtype=np.float32)
-        q_vec = q_vec / (np.linalg.norm(q_vec) + 1e-12)
+    def search_vector(self, q_vec: np.ndarray, top_k: int = 5) -> List[Dict]:
+        return self.search_vectors(q_vec[None, :], top_k=top_k)[0]
 
-        # cosine similarity (matmul)
-        sims = self._emb @ q_vec  # (N,)
-        # top-k
-        if top_k >= len(sims):
-            idx = np.argsort(-sims)
-        else:
-            idx = np.argpartition(-sims, top_k)[:top_k]
-            idx = idx[np.argsort(-sims[idx])]
-
-        hits: List[Dict] = []
-        for i in idx:
-            i = int(i)
-            hits.append({
-                "text": str(self._docs[i]),
-                "metadata": self._metas[i],
-                "score": float(sims[i]),
-            })
-        return hits
+    def search_vectors(self, q_mat: np.ndarray, top_k: int = 5) -> List[List[Dict]]:
+        if not self.exists():
+            return [[] for _ in range(len(q_mat))]
+
+        # referințe locale: cache-ul poate fi eliberat (unload) din alt thread
+        emb, docs, metas = self._load_all()
+        assert emb is not None and docs is not None and metas is not None
+
+        # cosine similarity (un singur matmul pentru toate întrebările)
+        sims_all = emb @ q_mat.T  # (N, Q)
+        results: List[List[Dict]] = []
+        for sims in sims_all.T:
+            # top-k
+            if top_k >= len(sims):
+                idx = np.argsort(-sims)
+            else:
+                idx = np.argpartition(-sims, top_k)[:top_k]
+                idx = idx[np.argsort(-sims[idx])]
+
+            hits: List[Dict] = []
+            for i in idx:
+                i = int(i)
+                hits.append({
+                    "text": str(docs[i]),
+                    "metadata": metas[i],
+                    "score": float(sims[i]),
+                    "idx": i,
+                })
+            results.append(hits)
+        return results
@@ -0,0 +1,80 @@
+# warm_faq.py — precalculează răspunsurile FAQ (întrebări × produse) pentru app
+import argparse
+from pathlib import Path
+
+from src.config import Settings
+from src.utils import ensure_dirs, Timer
+from src.vectorstore import VectorStore
+from src.sharded import ShardedVectorStore
+from src.retriever import Retriever
+from src.reranker import Reranker
+from src.rag_chain import RAGChain
+from src.faq import FAQCache, DEFAULT_QUESTIONS, warm_up
+
+BASE = Path.cwd()
+DATA = BASE / "data"
+INDEX = DATA / "index"
+OUTPUT = DATA / "output"
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Warm-up FAQ: răspunsuri precalculate, verificate de app înainte de RAG live.")
+    ap.add_argument("--questions", help="fișier text, o întrebare pe linie (implicit lista FAQ standard)")
+    ap.add_argument("--products", nargs="*",
+                    help="shard-uri/produse (ex. IPID_My_Car); 'all' = toate; doar cu INDEX_SHARDED=true")
+    ap.add_argument("--workers", type=int, help="apeluri LLM în paralel (implicit FAQ_WORKERS)")
+    ap.add_argument("--force", action="store_true", help="recalculează și intrările încă valide")
+    args = ap.parse_args()
+
+    settings = Settings()
+    if args.questions:
+        with open(args.questions, encoding="utf-8") as f:
+            questions = [ln.strip() for ln in f if ln.strip()]
+    else:
+        questions = DEFAULT_QUESTIONS
+
+    if settings.INDEX_SHARDED:
+        vs = ShardedVectorStore(index_dir=INDEX, settings=settings)
+        if args.products is None:
+            products = [None]
+        elif args.products in ([], ["all"]):
+            products = vs.indexed_keys()
+        else:
+            products = args.products
+            unknown = [p for p in products if p not in vs.indexed_keys()]
+            if unknown:
+                print(f"[faq] Produse necunoscute sau fără index: {', '.join(unknown)}. "
+                      f"Disponibile: {', '.join(vs.indexed_keys())}")
+                return
+    else:
+        vs = VectorStore(index_dir=INDEX)
+        if args.products:
+            print("[faq] --products cere indexul shard-uit (INDEX_SHARDED=true).")
+            return
+        products = [None]
+
+    if not vs.exists():
+        print("[faq] Nu există index. Rulează întâi:  python prepare_index.py")
+        return
+
+    ensure_dirs(OUTPUT)
+    retriever = Retriever(vs, reranker=Reranker(settings), rrf_k=settings.RRF_K)
+    rag = RAGChain(settings=settings)
+    cache = FAQCache(OUTPUT)
+
+    print(f"[faq] {len(questions)} întrebări × {len(products)} produse, LLM: {settings.LLM_PROVIDER}")
+    with Timer() as t:
+        stats = warm_up(
+            retriever, rag, cache, questions, products,
+            top_k=settings.TOP_K,
+            max_chars=settings.MAX_CONTEXT_CHARS,
+            workers=args.workers or settings.FAQ_WORKERS,
+            force=args.force,
+        )
+    print(f"[faq] încă valide: {stats['fresh']}, recalculate: {stats['computed']}, "
+          f"erori: {stats['failed']}, fără index: {stats['skipped']}")
+    print(f"[faq] Gata în {t.elapsed:.1f}s -> {cache.path}")
+
+
+if __name__ == "__main__":
+    main()